@@ -1,16 +1,49 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, send_from_directory
+from flask import Flask, render_template, request, redirect, url_for, flash, session, send_from_directory, Response
 from flask_sqlalchemy import SQLAlchemy
 import os
 from werkzeug.utils import secure_filename
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import text
+from sqlalchemy import text, select, insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 import random
+import csv
+import io
+import smtplib
+from email.message import EmailMessage
+from datetime import date, datetime, timedelta, timezone
+import hashlib
+import json
+import queue
+import re
+import threading
+import zipfile
+from xml.etree import ElementTree
+
+# pypdf é opcional: sem ele, currículos em PDF ficam fora da busca
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
 
 # Configuração inicial do aplicativo
 app = Flask(__name__)
 app.secret_key = 'chave_secreta_segura' # Necessário para mensagens de feedback
-app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///site_estagios.db'
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get('DATABASE_URL', 'sqlite:///site_estagios.db')
 app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['MAX_CONTENT_LENGTH'] = 10 * 1024 * 1024 # Limite de 10 MB por envio (fotos e currículos)
+
+# Notificações: tamanho do lote do fan-out e envio de email
+app.config['NOTIFICACOES_LOTE'] = 1000
+app.config['EMAIL_MAX_TENTATIVAS'] = 5
+app.config['EMAIL_ESPERA_SEGUNDOS'] = 30 # Espera antes da 1ª nova tentativa (dobra a cada falha)
+app.config['EMAIL_BACKEND'] = os.environ.get('EMAIL_BACKEND', 'local') # 'local' ou 'smtp'
+app.config['EMAIL_PASTA_LOCAL'] = 'emails_enviados' # Onde o backend local grava os emails
+app.config['EMAIL_REMETENTE'] = os.environ.get('EMAIL_REMETENTE', 'nao-responda@estagiofacil.com')
+app.config['SMTP_SERVIDOR'] = os.environ.get('SMTP_SERVIDOR', 'localhost')
+app.config['SMTP_PORTA'] = int(os.environ.get('SMTP_PORTA', 587))
+app.config['SMTP_USUARIO'] = os.environ.get('SMTP_USUARIO')
+app.config['SMTP_SENHA'] = os.environ.get('SMTP_SENHA')
+app.config['SMTP_TLS'] = os.environ.get('SMTP_TLS', '1') == '1'
 
 # Garantir que a pasta de uploads existe
 if not os.path.exists(app.config['UPLOAD_FOLDER']):
@@ -76,6 +109,72 @@ class Candidatura(db.Model):
     
     usuario = db.relationship('Usuario', backref=db.backref('candidaturas', lazy=True))
     vaga = db.relationship('Vaga', backref=db.backref('candidaturas', lazy=True))
+
+class CurriculoTexto(db.Model):
+    # Texto extraído do currículo de cada aluno (um registro por aluno)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), primary_key=True)
+    arquivo = db.Column(db.String(120), nullable=False)
+    
+    # Assinatura do arquivo: só extrai de novo quando ela muda
+    tamanho = db.Column(db.Integer, nullable=False)
+    modificado_em = db.Column(db.Float, nullable=False)
+    hash_sha256 = db.Column(db.String(64), nullable=False)
+    
+    texto = db.Column(db.Text, nullable=False, default='')
+    data_extracao = db.Column(db.DateTime, server_default=db.func.now(), onupdate=db.func.now())
+
+class PreferenciaNotificacao(db.Model):
+    # Vagas que o aluno quer receber (área/tipo vazios = qualquer um)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), primary_key=True)
+    area = db.Column(db.String(50), nullable=True, index=True)
+    tipo = db.Column(db.String(50), nullable=True)
+    receber_email = db.Column(db.Boolean, nullable=False, default=True)
+
+class Notificacao(db.Model):
+    # Caixa de entrada de cada usuário
+    id = db.Column(db.Integer, primary_key=True)
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), nullable=False)
+    vaga_id = db.Column(db.Integer, db.ForeignKey('vaga.id'), nullable=True)
+    titulo = db.Column(db.String(150), nullable=False)
+    mensagem = db.Column(db.Text, nullable=False)
+    lida = db.Column(db.Boolean, nullable=False, default=False)
+    data_criacao = db.Column(db.DateTime, server_default=db.func.now())
+    
+    __table_args__ = (db.Index('ix_notificacao_usuario_lida', 'usuario_id', 'lida'),)
+
+class EnvioNotificacao(db.Model):
+    # Progresso do fan-out de uma vaga: permite retomar após reiniciar o servidor
+    vaga_id = db.Column(db.Integer, db.ForeignKey('vaga.id'), primary_key=True)
+    ultimo_id = db.Column(db.Integer, nullable=False, default=0) # Último aluno já notificado (keyset)
+    concluido = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    data_criacao = db.Column(db.DateTime, server_default=db.func.now())
+
+class LoteEmail(db.Model):
+    # Um lote de emails de uma vaga, enviado e reenviado separadamente das notificações
+    id = db.Column(db.Integer, primary_key=True)
+    vaga_id = db.Column(db.Integer, db.ForeignKey('vaga.id'), nullable=False)
+    destinatarios = db.Column(db.Text, nullable=False) # Lista JSON com os ids dos alunos
+    tentativas = db.Column(db.Integer, nullable=False, default=0)
+    enviado = db.Column(db.Boolean, nullable=False, default=False, index=True)
+    erro = db.Column(db.Text, nullable=True) # Última falha, para diagnóstico
+    data_criacao = db.Column(db.DateTime, server_default=db.func.now())
+
+class ContadorNotificacoes(db.Model):
+    # Total de não lidas por usuário, para não contar a caixa a cada página
+    usuario_id = db.Column(db.Integer, db.ForeignKey('usuario.id'), primary_key=True)
+    nao_lidas = db.Column(db.Integer, nullable=False, default=0)
+
+class MetricaDiaria(db.Model):
+    # Agregados diários para os relatórios (atualizados a cada evento, sem varrer as tabelas)
+    id = db.Column(db.Integer, primary_key=True)
+    metrica = db.Column(db.String(40), nullable=False) # 'cadastros', 'vagas_area', 'candidaturas_vaga'...
+    chave = db.Column(db.String(50), nullable=False, default='') # tipo, área, id da vaga/empresa
+    dia = db.Column(db.Date, nullable=False)
+    
+    valor = db.Column(db.Integer, nullable=False, default=0) # Eventos no dia
+    acumulado = db.Column(db.Integer, nullable=False, default=0) # Total desde o início até este dia
+    
+    __table_args__ = (db.UniqueConstraint('metrica', 'chave', 'dia', name='uq_metrica_chave_dia'),)
 # --- Adicione junto com as outras rotas ---
 
 @app.route('/setup/popular-banco')
@@ -84,6 +183,7 @@ def popular_banco():
     if not Usuario.query.filter_by(email='admin@portal.com').first():
         admin = Usuario(tipo='admin', nome='Administrador', email='admin@portal.com', senha=generate_password_hash('admin123'))
         db.session.add(admin)
+        registrar_cadastro(admin)
 
     # 2. Cria EMPRESAS Fakes
     empresas_dados = [
@@ -106,6 +206,7 @@ def popular_banco():
                 sobre_mim=f"Somos a {emp['nome']}, líderes em inovação e tecnologia."
             )
             db.session.add(nova_empresa)
+            registrar_cadastro(nova_empresa)
             lista_empresas_objs.append(nova_empresa)
     
     db.session.commit() # Salva empresas para gerar os IDs
@@ -131,6 +232,7 @@ def popular_banco():
                 dados_bancarios='Nubank, Ag 0001, Conta 12345-6'
             )
             db.session.add(novo_aluno)
+            registrar_cadastro(novo_aluno)
             lista_alunos_objs.append(novo_aluno)
             
     db.session.commit() # Salva alunos
@@ -164,6 +266,7 @@ def popular_banco():
                 empresa_id=empresa_dona.id
             )
             db.session.add(nova_vaga)
+            registrar_vaga(nova_vaga)
         
         db.session.commit()
 
@@ -180,6 +283,7 @@ def popular_banco():
                 if not Candidatura.query.filter_by(usuario_id=aluno.id, vaga_id=vaga.id).first():
                     cand = Candidatura(usuario_id=aluno.id, vaga_id=vaga.id)
                     db.session.add(cand)
+                    registrar_candidatura(vaga)
         
         db.session.commit()
 
@@ -204,9 +308,15 @@ def candidatar_vaga(vaga_id):
         flash('Você já se candidatou para esta vaga!', 'info')
         return redirect(url_for('home'))
     
+    vaga = db.session.get(Vaga, vaga_id)
+    if not vaga:
+        flash('Vaga não encontrada.', 'error')
+        return redirect(url_for('home'))
+    
     # 4. Salva a candidatura
     nova_candidatura = Candidatura(usuario_id=session['user_id'], vaga_id=vaga_id)
     db.session.add(nova_candidatura)
+    registrar_candidatura(vaga)
     db.session.commit()
     
     flash('Candidatura enviada com sucesso! Boa sorte 🚀', 'success')
@@ -216,6 +326,577 @@ def candidatar_vaga(vaga_id):
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+# Currículos levam o id do aluno no nome, para dois "cv.pdf" não se sobrescreverem
+def nome_arquivo_curriculo(usuario, filename):
+    return secure_filename(f"aluno_{usuario.id}_{filename}")
+
+# --- Tarefas em segundo plano ---
+
+# Uma thread por fila, criada na primeira tarefa agendada
+_workers = {}
+_workers_lock = threading.Lock()
+
+def _loop_worker(fila, processar):
+    while True:
+        item = fila.get()
+        try:
+            with app.app_context():
+                processar(item)
+        except Exception as e:
+            print(f"Erro na tarefa {processar.__name__}({item}): {e}")
+        finally:
+            fila.task_done()
+
+def agendar_tarefa(fila, processar, item):
+    with _workers_lock:
+        worker = _workers.get(id(fila))
+        if worker is None or not worker.is_alive():
+            worker = threading.Thread(target=_loop_worker, args=(fila, processar), daemon=True)
+            worker.start()
+            _workers[id(fila)] = worker
+    fila.put(item)
+
+# --- Métricas e relatórios (agregados diários) ---
+
+def hoje_utc():
+    # Mesmo fuso do CURRENT_TIMESTAMP do SQLite, usado em data_criacao
+    return datetime.now(timezone.utc).date()
+
+def registrar_metrica(metrica, chave='', quantidade=1, dia=None):
+    # Soma um evento no agregado do dia (o commit fica com quem chamou)
+    dia = dia or hoje_utc()
+    chave = str(chave or '')
+    filtro = (MetricaDiaria.metrica == metrica, MetricaDiaria.chave == chave)
+
+    # Upsert atômico: requisições simultâneas somam no banco, sem ler e regravar em Python.
+    # Linha nova parte do acumulado do último dia anterior; linha existente soma só o valor do evento.
+    m = db.aliased(MetricaDiaria)
+    acumulado_anterior = (select(m.acumulado).where(m.metrica == metrica, m.chave == chave, m.dia < dia)
+                          .order_by(m.dia.desc()).limit(1).scalar_subquery())
+    comando = sqlite_insert(MetricaDiaria).values(
+        metrica=metrica, chave=chave, dia=dia, valor=quantidade,
+        acumulado=db.func.coalesce(acumulado_anterior, 0) + quantidade)
+    comando = comando.on_conflict_do_update(
+        index_elements=['metrica', 'chave', 'dia'],
+        set_={'valor': MetricaDiaria.valor + comando.excluded.valor,
+              'acumulado': MetricaDiaria.acumulado + comando.excluded.valor})
+    db.session.execute(comando)
+
+    # Eventos retroativos também corrigem o acumulado dos dias seguintes
+    MetricaDiaria.query.filter(*filtro, MetricaDiaria.dia > dia).update(
+        {MetricaDiaria.acumulado: MetricaDiaria.acumulado + quantidade}, synchronize_session=False)
+
+def registrar_cadastro(usuario, dia=None):
+    registrar_metrica('cadastros', usuario.tipo, dia=dia)
+
+def registrar_vaga(vaga, dia=None):
+    registrar_metrica('vagas', dia=dia)
+    registrar_metrica('vagas_area', vaga.area, dia=dia)
+
+def registrar_candidatura(vaga, dia=None):
+    registrar_metrica('candidaturas', dia=dia)
+    registrar_metrica('candidaturas_vaga', vaga.id, dia=dia)
+    registrar_metrica('candidaturas_empresa', vaga.empresa_id, dia=dia)
+
+def reconstruir_metricas():
+    # Recalcula todos os agregados a partir das tabelas (só para a carga inicial)
+    MetricaDiaria.query.delete()
+
+    eventos = {}
+    def somar(metrica, chave, dia, quantidade):
+        if dia is None:
+            return
+        dia = date.fromisoformat(str(dia)[:10])
+        eventos[(metrica, str(chave or ''), dia)] = eventos.get((metrica, str(chave or ''), dia), 0) + quantidade
+
+    dia_usuario = db.func.date(Usuario.data_criacao)
+    for tipo, dia, total in db.session.query(Usuario.tipo, dia_usuario, db.func.count()).group_by(Usuario.tipo, dia_usuario):
+        somar('cadastros', tipo, dia, total)
+
+    dia_vaga = db.func.date(Vaga.data_criacao)
+    for area, dia, total in db.session.query(Vaga.area, dia_vaga, db.func.count()).group_by(Vaga.area, dia_vaga):
+        somar('vagas', '', dia, total)
+        somar('vagas_area', area, dia, total)
+
+    dia_candidatura = db.func.date(Candidatura.data_aplicacao)
+    consulta = (db.session.query(Vaga.id, Vaga.empresa_id, dia_candidatura, db.func.count())
+                .join(Candidatura, Candidatura.vaga_id == Vaga.id)
+                .group_by(Vaga.id, Vaga.empresa_id, dia_candidatura))
+    for vaga_id, empresa_id, dia, total in consulta:
+        somar('candidaturas', '', dia, total)
+        somar('candidaturas_vaga', vaga_id, dia, total)
+        somar('candidaturas_empresa', empresa_id, dia, total)
+
+    acumulados = {}
+    for (metrica, chave, dia), valor in sorted(eventos.items(), key=lambda item: item[0][2]):
+        acumulados[(metrica, chave)] = acumulados.get((metrica, chave), 0) + valor
+        db.session.add(MetricaDiaria(metrica=metrica, chave=chave, dia=dia, valor=valor,
+                                     acumulado=acumulados[(metrica, chave)]))
+    db.session.commit()
+
+def totais_por_chave(metrica, inicio, fim):
+    # Total de cada chave no período: acumulado(fim) - acumulado(véspera do início)
+    # São duas buscas no índice por chave, independente do tamanho do período
+    chaves = db.session.query(MetricaDiaria.chave).filter(MetricaDiaria.metrica == metrica).distinct().subquery()
+    m = db.aliased(MetricaDiaria)
+    ate_fim = (select(m.acumulado).where(m.metrica == metrica, m.chave == chaves.c.chave, m.dia <= fim)
+               .order_by(m.dia.desc()).limit(1).scalar_subquery())
+    antes_inicio = (select(m.acumulado).where(m.metrica == metrica, m.chave == chaves.c.chave, m.dia < inicio)
+                    .order_by(m.dia.desc()).limit(1).scalar_subquery())
+    linhas = db.session.query(chaves.c.chave, db.func.coalesce(ate_fim, 0) - db.func.coalesce(antes_inicio, 0)).all()
+    return {chave: total for chave, total in linhas if total}
+
+def total_periodo(metrica, inicio, fim, chave=''):
+    return totais_por_chave(metrica, inicio, fim).get(str(chave), 0)
+
+# Séries dia a dia crescem com o período, então ficam limitadas a um ano
+MAX_DIAS_SERIE = 366
+
+def limitar_serie(inicio, fim):
+    return max(inicio, fim - timedelta(days=MAX_DIAS_SERIE - 1))
+
+def serie_diaria(metrica, inicio, fim):
+    # Valores dia a dia por chave, com zero nos dias sem eventos (para gráficos)
+    inicio = limitar_serie(inicio, fim)
+    dias = [inicio + timedelta(days=i) for i in range((fim - inicio).days + 1)]
+    series = {}
+    registros = MetricaDiaria.query.filter(MetricaDiaria.metrica == metrica,
+                                           MetricaDiaria.dia >= inicio, MetricaDiaria.dia <= fim).all()
+    for registro in registros:
+        serie = series.setdefault(registro.chave, dict.fromkeys(dias, 0))
+        serie[registro.dia] = registro.valor
+    return dias, {chave: [serie[dia] for dia in dias] for chave, serie in sorted(series.items())}
+
+def ler_periodo(args, dias_padrao=30):
+    # Lê ?inicio=AAAA-MM-DD&fim=AAAA-MM-DD (padrão: últimos 30 dias)
+    # Data mal formatada levanta ValueError para a rota decidir o que fazer
+    fim = date.fromisoformat(args['fim']) if args.get('fim') else hoje_utc()
+    inicio = date.fromisoformat(args['inicio']) if args.get('inicio') else fim - timedelta(days=dias_padrao - 1)
+    if inicio > fim:
+        inicio, fim = fim, inicio
+    return inicio, fim
+
+def taxa_conversao(candidaturas, vagas):
+    # Candidaturas recebidas por vaga publicada
+    return round(candidaturas / vagas, 2) if vagas else 0
+
+# Relatórios com uma linha por dia (limitados a MAX_DIAS_SERIE)
+RELATORIOS_DIARIOS = ('cadastros', 'vagas_area', 'conversao')
+
+RELATORIOS_CSV = {
+    'cadastros': 'Cadastros por tipo',
+    'vagas_area': 'Vagas publicadas por área',
+    'candidaturas_vaga': 'Candidaturas por vaga',
+    'candidaturas_empresa': 'Candidaturas por empresa',
+    'conversao': 'Conversão candidaturas/vagas',
+}
+
+def gerar_relatorio_csv(relatorio, inicio, fim):
+    saida = io.StringIO()
+    escritor = csv.writer(saida)
+
+    if relatorio in ('cadastros', 'vagas_area'):
+        dias, series = serie_diaria(relatorio, inicio, fim)
+        escritor.writerow(['dia'] + list(series))
+        for i, dia in enumerate(dias):
+            escritor.writerow([dia.isoformat()] + [serie[i] for serie in series.values()])
+
+    elif relatorio == 'conversao':
+        dias, vagas = serie_diaria('vagas', inicio, fim)
+        _, candidaturas = serie_diaria('candidaturas', inicio, fim)
+        vagas = vagas.get('', [0] * len(dias))
+        candidaturas = candidaturas.get('', [0] * len(dias))
+        escritor.writerow(['dia', 'vagas', 'candidaturas', 'candidaturas_por_vaga'])
+        for i, dia in enumerate(dias):
+            escritor.writerow([dia.isoformat(), vagas[i], candidaturas[i], taxa_conversao(candidaturas[i], vagas[i])])
+
+    elif relatorio == 'candidaturas_vaga':
+        totais = totais_por_chave(relatorio, inicio, fim)
+        vagas = {vaga.id: vaga for vaga in Vaga.query.filter(Vaga.id.in_([int(chave) for chave in totais])).all()}
+        escritor.writerow(['vaga_id', 'titulo', 'empresa', 'candidaturas'])
+        for chave, total in sorted(totais.items(), key=lambda item: -item[1]):
+            vaga = vagas.get(int(chave))
+            escritor.writerow([chave, vaga.titulo if vaga else '(vaga removida)',
+                               vaga.empresa.nome if vaga else '', total])
+
+    elif relatorio == 'candidaturas_empresa':
+        totais = totais_por_chave(relatorio, inicio, fim)
+        empresas = {u.id: u for u in Usuario.query.filter(Usuario.id.in_([int(chave) for chave in totais])).all()}
+        escritor.writerow(['empresa_id', 'empresa', 'candidaturas'])
+        for chave, total in sorted(totais.items(), key=lambda item: -item[1]):
+            empresa = empresas.get(int(chave))
+            escritor.writerow([chave, empresa.nome if empresa else '(empresa removida)', total])
+
+    return saida.getvalue()
+
+# --- Notificações de novas vagas ---
+
+fila_notificacoes = queue.Queue()
+fila_emails = queue.Queue()
+
+# Valor do formulário de perfil para "qualquer área" (gravado como area=None)
+PREFERENCIA_QUALQUER_AREA = 'todas'
+
+# Nomes das áreas das vagas (mesmas opções do formulário de nova vaga)
+AREAS_VAGA = {
+    'ti': 'Tecnologia (TI)',
+    'adm': 'Administração',
+    'rh': 'Recursos Humanos',
+    'mkt': 'Marketing',
+    'eng': 'Engenharia',
+}
+
+def enviar_emails_local(mensagens):
+    # Substituto do SMTP para desenvolvimento: grava cada email como .eml
+    pasta = app.config['EMAIL_PASTA_LOCAL']
+    os.makedirs(pasta, exist_ok=True)
+    for mensagem in mensagens:
+        nome = f"{datetime.now().strftime('%Y%m%d%H%M%S%f')}_{secure_filename(mensagem['To'])}.eml"
+        with open(os.path.join(pasta, nome), 'wb') as arquivo:
+            arquivo.write(bytes(mensagem))
+
+def enviar_emails_smtp(mensagens):
+    # Uma conexão por lote
+    with smtplib.SMTP(app.config['SMTP_SERVIDOR'], app.config['SMTP_PORTA']) as smtp:
+        if app.config['SMTP_TLS']:
+            smtp.starttls()
+        if app.config['SMTP_USUARIO']:
+            smtp.login(app.config['SMTP_USUARIO'], app.config['SMTP_SENHA'])
+        for mensagem in mensagens:
+            smtp.send_message(mensagem)
+
+# Para outro provedor, basta registrar a função aqui e apontar EMAIL_BACKEND para ela
+EMAIL_BACKENDS = {
+    'local': enviar_emails_local,
+    'smtp': enviar_emails_smtp,
+}
+
+def enviar_emails(mensagens):
+    if mensagens:
+        EMAIL_BACKENDS[app.config['EMAIL_BACKEND']](mensagens)
+
+def montar_email_vaga(vaga, destinatario):
+    mensagem = EmailMessage()
+    mensagem['Subject'] = f"Nova vaga: {vaga.titulo}"
+    mensagem['From'] = app.config['EMAIL_REMETENTE']
+    mensagem['To'] = destinatario
+    mensagem.set_content(f"Olá!\n\nA empresa {vaga.empresa.nome} publicou a vaga \"{vaga.titulo}\" "
+                         f"({vaga.tipo or 'modalidade não informada'}), que combina com as suas preferências.\n\n"
+                         f"Acesse o EstágioFácil para ver os detalhes e se candidatar.")
+    return mensagem
+
+def consulta_alunos_interessados(vaga):
+    # Alunos cujas preferências combinam com a área e o tipo da vaga
+    return (db.session.query(Usuario.id, Usuario.email, PreferenciaNotificacao.receber_email)
+            .join(PreferenciaNotificacao, PreferenciaNotificacao.usuario_id == Usuario.id)
+            .filter(Usuario.tipo == 'aluno',
+                    db.or_(PreferenciaNotificacao.area == None, PreferenciaNotificacao.area == vaga.area),
+                    db.or_(PreferenciaNotificacao.tipo == None, PreferenciaNotificacao.tipo == vaga.tipo)))
+
+def notificar_nova_vaga(vaga_id):
+    # Fan-out em lotes. Cada commit grava as notificações, os contadores, o lote de emails
+    # e o avanço do cursor em EnvioNotificacao, então um reinício continua de onde parou
+    envio = db.session.get(EnvioNotificacao, vaga_id)
+    if envio is None or envio.concluido:
+        return 0
+
+    vaga = db.session.get(Vaga, vaga_id)
+    if not vaga:
+        envio.concluido = True
+        db.session.commit()
+        return 0
+
+    titulo = f"Nova vaga: {vaga.titulo}"
+    mensagem = (f"{vaga.empresa.nome} publicou uma vaga de {AREAS_VAGA.get(vaga.area, vaga.area)} "
+                f"({vaga.tipo}) que combina com o seu perfil.")
+    tamanho_lote = app.config['NOTIFICACOES_LOTE']
+    ultimo_id = envio.ultimo_id
+    total = 0
+
+    while True:
+        # Paginação pelo id (keyset), sem OFFSET
+        lote = (consulta_alunos_interessados(vaga)
+                .filter(Usuario.id > ultimo_id)
+                .order_by(Usuario.id)
+                .limit(tamanho_lote)
+                .all())
+        proximo_id = lote[-1].id if lote else ultimo_id
+
+        # Avança o cursor só se ninguém avançou antes (ex.: o processo do reloader do Flask
+        # retomando a mesma vaga); se outro worker pegou o lote, este para aqui
+        avancou = (EnvioNotificacao.query
+                   .filter_by(vaga_id=vaga_id, ultimo_id=ultimo_id, concluido=False)
+                   .update({'ultimo_id': proximo_id, 'concluido': not lote}))
+        if not avancou:
+            db.session.rollback()
+            break
+        if not lote:
+            db.session.commit()
+            break
+
+        db.session.execute(insert(Notificacao), [
+            {'usuario_id': aluno.id, 'vaga_id': vaga.id, 'titulo': titulo, 'mensagem': mensagem, 'lida': False}
+            for aluno in lote
+        ])
+        somar_nao_lidas([aluno.id for aluno in lote], 1)
+
+        destinatarios = [aluno.id for aluno in lote if aluno.receber_email and aluno.email]
+        lote_email = None
+        if destinatarios:
+            lote_email = LoteEmail(vaga_id=vaga.id, destinatarios=json.dumps(destinatarios))
+            db.session.add(lote_email)
+        db.session.commit()
+
+        # O email vai para outra fila: a caixa de entrada não espera o SMTP
+        if lote_email:
+            agendar_lote_email(lote_email.id)
+
+        ultimo_id = proximo_id
+        total += len(lote)
+
+    return total
+
+def agendar_notificacao_vaga(vaga_id):
+    # O fan-out roda em segundo plano para não travar a publicação da vaga
+    agendar_tarefa(fila_notificacoes, notificar_nova_vaga, vaga_id)
+
+def enviar_lote_email(lote_id):
+    lote = db.session.get(LoteEmail, lote_id)
+    if lote is None or lote.enviado:
+        return
+    tentativa = lote.tentativas + 1
+
+    # Reserva a tentativa; se outro worker já reservou, não envia de novo
+    reservado = (LoteEmail.query.filter_by(id=lote_id, enviado=False, tentativas=lote.tentativas)
+                 .update({'tentativas': tentativa}))
+    db.session.commit()
+    if not reservado:
+        return
+
+    lote = db.session.get(LoteEmail, lote_id)
+    vaga = db.session.get(Vaga, lote.vaga_id)
+    try:
+        if vaga:
+            emails = db.session.query(Usuario.email).filter(Usuario.id.in_(json.loads(lote.destinatarios))).all()
+            enviar_emails([montar_email_vaga(vaga, email) for (email,) in emails if email])
+    except Exception as e:
+        lote.erro = str(e)[:500]
+        db.session.commit()
+        print(f"Erro ao enviar o lote de emails {lote_id} (tentativa {tentativa}): {e}")
+        if tentativa < app.config['EMAIL_MAX_TENTATIVAS']:
+            espera = app.config['EMAIL_ESPERA_SEGUNDOS'] * 2 ** (tentativa - 1)
+            nova_tentativa = threading.Timer(espera, agendar_lote_email, args=(lote_id,))
+            nova_tentativa.daemon = True
+            nova_tentativa.start()
+        return
+
+    lote.enviado = True
+    lote.erro = None
+    db.session.commit()
+
+def agendar_lote_email(lote_id):
+    agendar_tarefa(fila_emails, enviar_lote_email, lote_id)
+
+def retomar_notificacoes():
+    # Reenfileira fan-outs interrompidos e lotes de email ainda não enviados
+    for (vaga_id,) in db.session.query(EnvioNotificacao.vaga_id).filter_by(concluido=False).order_by(EnvioNotificacao.vaga_id):
+        agendar_notificacao_vaga(vaga_id)
+    pendentes = (db.session.query(LoteEmail.id)
+                 .filter(LoteEmail.enviado == False, LoteEmail.tentativas < app.config['EMAIL_MAX_TENTATIVAS'])
+                 .order_by(LoteEmail.id))
+    for (lote_id,) in pendentes:
+        agendar_lote_email(lote_id)
+
+def somar_nao_lidas(usuario_ids, quantidade):
+    # Upsert em lote no contador de não lidas
+    if not usuario_ids:
+        return
+    comando = sqlite_insert(ContadorNotificacoes)
+    comando = comando.on_conflict_do_update(
+        index_elements=['usuario_id'],
+        set_={'nao_lidas': db.func.max(ContadorNotificacoes.nao_lidas + comando.excluded.nao_lidas, 0)})
+    db.session.execute(comando, [{'usuario_id': usuario_id, 'nao_lidas': quantidade} for usuario_id in usuario_ids])
+
+def total_nao_lidas(usuario_id):
+    contador = db.session.get(ContadorNotificacoes, usuario_id)
+    return contador.nao_lidas if contador else 0
+
+def remover_notificacoes_usuario(usuario_id):
+    Notificacao.query.filter_by(usuario_id=usuario_id).delete()
+    ContadorNotificacoes.query.filter_by(usuario_id=usuario_id).delete()
+    PreferenciaNotificacao.query.filter_by(usuario_id=usuario_id).delete()
+
+@app.context_processor
+def injetar_notificacoes():
+    # Disponibiliza o contador de não lidas em todos os templates
+    if 'user_id' in session:
+        return {'notificacoes_nao_lidas': total_nao_lidas(session['user_id'])}
+    return {'notificacoes_nao_lidas': 0}
+
+# --- Extração de texto dos currículos e índice de busca ---
+
+# Tabela FTS5 do SQLite com o texto dos currículos (rowid = id do aluno)
+TABELA_BUSCA_CURRICULOS = 'curriculo_busca'
+busca_fts_disponivel = False
+
+fila_curriculos = queue.Queue()
+
+# Tamanho máximo do document.xml descompactado (protege contra "zip bombs")
+MAX_DOCX_XML_BYTES = 20 * 1024 * 1024
+
+def extrair_texto_docx(caminho):
+    # DOCX é um zip: o texto fica nos nós <w:t> de word/document.xml
+    with zipfile.ZipFile(caminho) as docx:
+        tamanho = docx.getinfo('word/document.xml').file_size
+        if tamanho > MAX_DOCX_XML_BYTES:
+            print(f"Currículo {caminho} ignorado: document.xml tem {tamanho} bytes descompactado")
+            return ''
+        xml = docx.read('word/document.xml')
+    raiz = ElementTree.fromstring(xml)
+    paragrafos = []
+    for paragrafo in raiz.iter('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}p'):
+        trechos = [no.text or '' for no in paragrafo.iter('{http://schemas.openxmlformats.org/wordprocessingml/2006/main}t')]
+        paragrafos.append(''.join(trechos))
+    return '\n'.join(paragrafos)
+
+def extrair_texto_pdf(caminho):
+    if PdfReader is None:
+        return ''
+    leitor = PdfReader(caminho)
+    return '\n'.join(pagina.extract_text() or '' for pagina in leitor.pages)
+
+def extrair_texto_curriculo(caminho):
+    extensao = caminho.rsplit('.', 1)[-1].lower()
+    try:
+        if extensao == 'docx':
+            return extrair_texto_docx(caminho)
+        if extensao == 'pdf':
+            return extrair_texto_pdf(caminho)
+    except Exception as e:
+        print(f"Erro ao extrair texto de {caminho}: {e}")
+    # .doc (formato binário antigo) não é suportado
+    return ''
+
+def calcular_hash_arquivo(caminho):
+    sha = hashlib.sha256()
+    with open(caminho, 'rb') as arquivo:
+        for bloco in iter(lambda: arquivo.read(65536), b''):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+def atualizar_indice_busca(usuario_id, texto):
+    if not busca_fts_disponivel:
+        return
+    db.session.execute(text(f"DELETE FROM {TABELA_BUSCA_CURRICULOS} WHERE rowid = :id"), {'id': usuario_id})
+    if texto:
+        db.session.execute(text(f"INSERT INTO {TABELA_BUSCA_CURRICULOS} (rowid, texto) VALUES (:id, :texto)"),
+                           {'id': usuario_id, 'texto': texto})
+
+def remover_curriculo_indexado(usuario_id):
+    CurriculoTexto.query.filter_by(usuario_id=usuario_id).delete()
+    atualizar_indice_busca(usuario_id, '')
+
+def processar_curriculo(usuario_id):
+    # Extrai e indexa o currículo do aluno, mas só se o arquivo mudou
+    usuario = db.session.get(Usuario, usuario_id)
+    if not usuario or not usuario.curriculo:
+        remover_curriculo_indexado(usuario_id)
+        db.session.commit()
+        return False
+
+    caminho = os.path.join(app.config['UPLOAD_FOLDER'], usuario.curriculo)
+    if not os.path.exists(caminho):
+        # Arquivo sumiu: o aluno não deve continuar aparecendo na busca
+        remover_curriculo_indexado(usuario_id)
+        db.session.commit()
+        return False
+
+    info = os.stat(caminho)
+    registro = db.session.get(CurriculoTexto, usuario_id)
+
+    # 1. Mesmo arquivo, mesmo tamanho e mesma data: nada a fazer
+    if (registro and registro.arquivo == usuario.curriculo
+            and registro.tamanho == info.st_size and registro.modificado_em == info.st_mtime):
+        return False
+
+    # 2. Data mudou mas o conteúdo é o mesmo: só atualiza a assinatura
+    hash_atual = calcular_hash_arquivo(caminho)
+    if registro and registro.hash_sha256 == hash_atual:
+        registro.arquivo = usuario.curriculo
+        registro.tamanho = info.st_size
+        registro.modificado_em = info.st_mtime
+        db.session.commit()
+        return False
+
+    # 3. Conteúdo novo: extrai o texto e atualiza o índice
+    texto_extraido = extrair_texto_curriculo(caminho)
+    if registro is None:
+        registro = CurriculoTexto(usuario_id=usuario_id)
+        db.session.add(registro)
+    registro.arquivo = usuario.curriculo
+    registro.tamanho = info.st_size
+    registro.modificado_em = info.st_mtime
+    registro.hash_sha256 = hash_atual
+    registro.texto = texto_extraido
+    atualizar_indice_busca(usuario_id, texto_extraido)
+    db.session.commit()
+    return True
+
+def agendar_extracao_curriculo(usuario_id):
+    # Coloca o aluno na fila; a extração roda numa thread em segundo plano
+    agendar_tarefa(fila_curriculos, processar_curriculo, usuario_id)
+
+def sincronizar_curriculos():
+    # Reenfileira todos os alunos com currículo; os que não mudaram são pulados
+    alunos = db.session.query(Usuario.id).filter(Usuario.tipo == 'aluno', Usuario.curriculo != None, Usuario.curriculo != '').all()
+    for (usuario_id,) in alunos:
+        agendar_extracao_curriculo(usuario_id)
+
+def montar_consulta_fts(termos):
+    # "Python Excel" -> "python"* AND "excel"* (todas as palavras, aceitando prefixo)
+    palavras = re.findall(r'\w+', termos.lower())
+    return ' AND '.join(f'"{palavra}"*' for palavra in palavras)
+
+def buscar_candidatos(empresa_id, termos, limite=50):
+    # Busca no texto dos currículos, apenas entre candidatos às vagas da empresa
+    candidatos_da_empresa = ("SELECT c.usuario_id FROM candidatura c "
+                             "JOIN vaga v ON v.id = c.vaga_id WHERE v.empresa_id = :empresa_id")
+
+    if busca_fts_disponivel:
+        consulta = montar_consulta_fts(termos)
+        if not consulta:
+            return []
+        sql = text(f"""
+            SELECT u.id, u.nome, u.email, u.telefone, u.curriculo,
+                   snippet({TABELA_BUSCA_CURRICULOS}, 0, '', '', '...', 16) AS trecho
+            FROM {TABELA_BUSCA_CURRICULOS}
+            JOIN usuario u ON u.id = {TABELA_BUSCA_CURRICULOS}.rowid
+            WHERE {TABELA_BUSCA_CURRICULOS} MATCH :consulta
+              AND {TABELA_BUSCA_CURRICULOS}.rowid IN ({candidatos_da_empresa})
+            ORDER BY rank
+            LIMIT :limite
+        """)
+        parametros = {'consulta': consulta, 'empresa_id': empresa_id, 'limite': limite}
+    else:
+        # Sem FTS5: busca simples com LIKE (mais lenta, mesmo resultado)
+        palavras = re.findall(r'\w+', termos.lower())
+        if not palavras:
+            return []
+        filtros = ' AND '.join(f"lower(ct.texto) LIKE :p{i}" for i in range(len(palavras)))
+        sql = text(f"""
+            SELECT u.id, u.nome, u.email, u.telefone, u.curriculo,
+                   substr(ct.texto, 1, 160) AS trecho
+            FROM curriculo_texto ct
+            JOIN usuario u ON u.id = ct.usuario_id
+            WHERE {filtros}
+              AND ct.usuario_id IN ({candidatos_da_empresa})
+            LIMIT :limite
+        """)
+        parametros = {f'p{i}': f'%{palavra}%' for i, palavra in enumerate(palavras)}
+        parametros.update({'empresa_id': empresa_id, 'limite': limite})
+
+    return db.session.execute(sql, parametros).mappings().all()
+
 # --- Rotas do Site ---
 
 @app.route('/')
@@ -253,14 +934,6 @@ def cadastro():
                 flash('Erro: Este CPF já está registrado!', 'error')
                 return redirect(url_for('cadastro'))
 
-            # Upload do Currículo
-            arquivo_cv = request.files.get('curriculo')
-            nome_cv = ''
-            if arquivo_cv and allowed_file(arquivo_cv.filename):
-                filename = secure_filename(arquivo_cv.filename)
-                arquivo_cv.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
-                nome_cv = filename
-            
             novo_usuario = Usuario(
                 tipo='aluno', 
                 nome=nome, 
@@ -268,7 +941,7 @@ def cadastro():
                 senha=generate_password_hash(senha),  # Senha com hash
                 telefone=telefone, 
                 cpf=cpf, 
-                curriculo=nome_cv
+                curriculo=''
             )
 
         # Lógica para EMPRESA
@@ -295,8 +968,23 @@ def cadastro():
 
         # Salvar na base de dados
         db.session.add(novo_usuario)
+        registrar_cadastro(novo_usuario)
+        
+        # Upload do Currículo (o nome do arquivo leva o id do aluno, então precisa do flush antes)
+        if novo_usuario.tipo == 'aluno':
+            arquivo_cv = request.files.get('curriculo')
+            if arquivo_cv and allowed_file(arquivo_cv.filename):
+                db.session.flush()
+                filename = nome_arquivo_curriculo(novo_usuario, arquivo_cv.filename)
+                arquivo_cv.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+                novo_usuario.curriculo = filename
+        
         db.session.commit()
         
+        # Indexa o currículo em segundo plano
+        if novo_usuario.tipo == 'aluno' and novo_usuario.curriculo:
+            agendar_extracao_curriculo(novo_usuario.id)
+        
         flash('Cadastro realizado com sucesso! Faça login para acessar sua conta.', 'success')
         return redirect(url_for('login'))
 
@@ -357,16 +1045,26 @@ def empresa_dashboard():
         )
         
         db.session.add(nova_vaga)
+        registrar_vaga(nova_vaga)
+        db.session.flush()
+        db.session.add(EnvioNotificacao(vaga_id=nova_vaga.id)) # Fan-out pendente, salvo junto com a vaga
         db.session.commit()
+        agendar_notificacao_vaga(nova_vaga.id) # Avisa os alunos interessados em segundo plano
         flash('Vaga publicada com sucesso!', 'success')
         return redirect(url_for('empresa_dashboard'))
 
     # SE FOR GET: MOSTRAR AS VAGAS DESSA EMPRESA
     minhas_vagas = Vaga.query.filter_by(empresa_id=session['user_id']).order_by(Vaga.data_criacao.desc()).all()
     
+    # Busca nos currículos dos candidatos (?busca=Python Excel)
+    busca = request.args.get('busca', '').strip()
+    resultados_busca = buscar_candidatos(session['user_id'], busca) if busca else []
+    
     return render_template('empresa_dashboard.html', 
                          user_name=session.get('user_name'),
-                         vagas=minhas_vagas)
+                         vagas=minhas_vagas,
+                         busca=busca,
+                         resultados_busca=resultados_busca)
 
 @app.route('/vaga/excluir/<int:id>')
 def excluir_vaga(id):
@@ -437,6 +1135,68 @@ def admin_dashboard():
                          total_empresas=total_empresas,      # Preenche o card laranja
                          ultimos_usuarios=ultimos_usuarios)  # Preenche a tabela
 
+@app.route('/admin/relatorios')
+def admin_relatorios():
+    if 'user_type' not in session or session['user_type'] != 'admin':
+        flash('Área restrita.', 'warning')
+        return redirect(url_for('home'))
+    
+    try:
+        inicio, fim = ler_periodo(request.args)
+    except ValueError:
+        flash('Data inválida. Use o formato AAAA-MM-DD.', 'error')
+        inicio, fim = ler_periodo({})
+    
+    if limitar_serie(inicio, fim) > inicio:
+        flash(f'Os gráficos mostram só os últimos {MAX_DIAS_SERIE} dias do período; os totais cobrem o período inteiro.', 'info')
+    
+    # Séries diárias para os gráficos
+    dias, cadastros = serie_diaria('cadastros', inicio, fim)
+    _, vagas_area = serie_diaria('vagas_area', inicio, fim)
+    _, candidaturas = serie_diaria('candidaturas', inicio, fim)
+    
+    # Totais do período (lidos do acumulado, sem somar dia a dia)
+    total_vagas = total_periodo('vagas', inicio, fim)
+    total_candidaturas = total_periodo('candidaturas', inicio, fim)
+    
+    return render_template('admin_relatorios.html',
+                         user_name=session.get('user_name'),
+                         inicio=inicio,
+                         fim=fim,
+                         dias=[dia.strftime('%d/%m') for dia in dias],
+                         cadastros=cadastros,
+                         vagas_area=vagas_area,
+                         candidaturas=candidaturas.get('', [0] * len(dias)),
+                         cadastros_por_tipo=totais_por_chave('cadastros', inicio, fim),
+                         vagas_por_area=totais_por_chave('vagas_area', inicio, fim),
+                         total_vagas=total_vagas,
+                         total_candidaturas=total_candidaturas,
+                         conversao=taxa_conversao(total_candidaturas, total_vagas),
+                         relatorios=RELATORIOS_CSV)
+
+@app.route('/admin/relatorios/<relatorio>.csv')
+def admin_relatorio_csv(relatorio):
+    if 'user_type' not in session or session['user_type'] != 'admin':
+        flash('Área restrita.', 'warning')
+        return redirect(url_for('home'))
+    
+    if relatorio not in RELATORIOS_CSV:
+        flash('Relatório não encontrado.', 'error')
+        return redirect(url_for('admin_relatorios'))
+    
+    try:
+        inicio, fim = ler_periodo(request.args)
+    except ValueError:
+        flash('Data inválida. Use o formato AAAA-MM-DD.', 'error')
+        return redirect(url_for('admin_relatorios'))
+    
+    if relatorio in RELATORIOS_DIARIOS:
+        inicio = limitar_serie(inicio, fim)
+    nome_arquivo = f"{relatorio}_{inicio.isoformat()}_{fim.isoformat()}.csv"
+    return Response(gerar_relatorio_csv(relatorio, inicio, fim),
+                    mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={nome_arquivo}'})
+
 @app.route('/logout')
 def logout():
     user_name = session.get('user_name')
@@ -475,6 +1235,8 @@ def excluir_usuario(id):
     
     usuario = Usuario.query.get(id)
     if usuario:
+        remover_curriculo_indexado(usuario.id)
+        remover_notificacoes_usuario(usuario.id)
         db.session.delete(usuario)
         db.session.commit()
         flash(f'Usuário {usuario.nome} excluído com sucesso.', 'success')
@@ -483,6 +1245,47 @@ def excluir_usuario(id):
     
     return redirect(url_for('admin_usuarios'))
 
+# Rotas de notificações
+@app.route('/notificacoes')
+def notificacoes():
+    if 'user_id' not in session:
+        flash('Faça login para ver suas notificações.', 'warning')
+        return redirect(url_for('login'))
+    
+    minhas_notificacoes = (Notificacao.query.filter_by(usuario_id=session['user_id'])
+                           .order_by(Notificacao.id.desc()).limit(50).all())
+    
+    return render_template('notificacoes.html',
+                         notificacoes=minhas_notificacoes,
+                         user_name=session.get('user_name'))
+
+@app.route('/notificacoes/ler/<int:id>')
+def ler_notificacao(id):
+    if 'user_id' not in session: return redirect(url_for('login'))
+    
+    notificacao = Notificacao.query.get(id)
+    # Só marca se a notificação for do próprio usuário
+    if notificacao and notificacao.usuario_id == session['user_id'] and not notificacao.lida:
+        notificacao.lida = True
+        somar_nao_lidas([notificacao.usuario_id], -1)
+        db.session.commit()
+    
+    # Abre a vaga na lista da home (se ela ainda existir)
+    if notificacao and notificacao.usuario_id == session['user_id'] and notificacao.vaga_id \
+            and db.session.get(Vaga, notificacao.vaga_id):
+        return redirect(url_for('home', _anchor=f'vaga-{notificacao.vaga_id}'))
+    return redirect(url_for('home'))
+
+@app.route('/notificacoes/ler-todas')
+def ler_todas_notificacoes():
+    if 'user_id' not in session: return redirect(url_for('login'))
+    
+    Notificacao.query.filter_by(usuario_id=session['user_id'], lida=False).update({'lida': True})
+    ContadorNotificacoes.query.filter_by(usuario_id=session['user_id']).update({'nao_lidas': 0})
+    db.session.commit()
+    
+    return redirect(url_for('notificacoes'))
+
 # Rota para perfil do usuário
 @app.route('/perfil')
 def perfil():
@@ -491,9 +1294,13 @@ def perfil():
         return redirect(url_for('login'))
     
     usuario = Usuario.query.get(session['user_id'])
+    preferencia = db.session.get(PreferenciaNotificacao, usuario.id)
     
     return render_template('perfil.html',
                          usuario=usuario,
+                         preferencia=preferencia,
+                         qualquer_area=PREFERENCIA_QUALQUER_AREA,
+                         areas=AREAS_VAGA,
                          user_name=session.get('user_name'))
 
 # Rota para atualizar perfil
@@ -514,6 +1321,22 @@ def atualizar_perfil():
         # Atualiza dados específicos
         if usuario.tipo == 'aluno':
             usuario.cpf = request.form.get('cpf', usuario.cpf)
+            
+            # Preferências para avisos de novas vagas
+            # '' = não quer avisos (apaga a preferência), PREFERENCIA_QUALQUER_AREA = todas as áreas
+            if 'pref_area' in request.form:
+                pref_area = request.form.get('pref_area')
+                preferencia = db.session.get(PreferenciaNotificacao, usuario.id)
+                if not pref_area:
+                    if preferencia:
+                        db.session.delete(preferencia)
+                else:
+                    if preferencia is None:
+                        preferencia = PreferenciaNotificacao(usuario_id=usuario.id)
+                        db.session.add(preferencia)
+                    preferencia.area = None if pref_area == PREFERENCIA_QUALQUER_AREA else pref_area
+                    preferencia.tipo = request.form.get('pref_tipo') or None
+                    preferencia.receber_email = request.form.get('pref_email') == 'on'
         elif usuario.tipo == 'empresa':
             usuario.cnpj = request.form.get('cnpj', usuario.cnpj)
             usuario.endereco = request.form.get('endereco', usuario.endereco)
@@ -600,6 +1423,12 @@ def ver_curriculo():
         flash('Nenhum currículo enviado.', 'info')
         return redirect(url_for('aluno_dashboard'))
 
+# Arquivo acima de MAX_CONTENT_LENGTH: volta para a página com aviso em vez da tela de erro
+@app.errorhandler(413)
+def arquivo_muito_grande(erro):
+    flash('Arquivo muito grande. O limite é de 10 MB.', 'error')
+    return redirect(request.referrer or url_for('home'))
+
 # Rota para upload de currículo
 @app.route('/curriculo/upload', methods=['POST'])
 def upload_curriculo():
@@ -611,10 +1440,11 @@ def upload_curriculo():
     
     arquivo_cv = request.files.get('curriculo')
     if arquivo_cv and allowed_file(arquivo_cv.filename):
-        filename = secure_filename(arquivo_cv.filename)
+        filename = nome_arquivo_curriculo(usuario, arquivo_cv.filename)
         arquivo_cv.save(os.path.join(app.config['UPLOAD_FOLDER'], filename))
         usuario.curriculo = filename
         db.session.commit()
+        agendar_extracao_curriculo(usuario.id) # Indexa em segundo plano
         flash('Currículo enviado com sucesso!', 'success')
     else:
         flash('Formato de arquivo inválido. Use PDF, DOC ou DOCX.', 'error')
@@ -627,6 +1457,16 @@ with app.app_context():
         # Tentar criar as tabelas
         db.create_all()
         
+        # Índice de busca dos currículos (FTS5 do SQLite)
+        try:
+            with db.engine.connect() as conn:
+                conn.execute(text(f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABELA_BUSCA_CURRICULOS} "
+                                  "USING fts5(texto, tokenize='unicode61 remove_diacritics 2')"))
+                conn.commit()
+            busca_fts_disponivel = True
+        except Exception as e:
+            print(f"FTS5 indisponível, busca de currículos usará LIKE: {e}")
+        
         # Verificar se as colunas de timestamp existem, se não, adicionar
         try:
             # Tenta fazer uma consulta que use as colunas
@@ -651,6 +1491,15 @@ with app.app_context():
                 
                 conn.commit()
         
+        # Carga inicial dos agregados para bancos criados antes dos relatórios
+        try:
+            if MetricaDiaria.query.first() is None and Usuario.query.first() is not None:
+                reconstruir_metricas()
+                print("Métricas diárias calculadas a partir dos dados existentes.")
+        except Exception as e:
+            db.session.rollback()
+            print(f"Erro ao calcular as métricas diárias: {e}")
+        
         # Cria usuário admin padrão se não existir
         admin_existente = Usuario.query.filter_by(email='admin@portal.com').first()
         if not admin_existente:
@@ -662,6 +1511,7 @@ with app.app_context():
                 telefone='(00) 00000-0000'
             )
             db.session.add(admin)
+            registrar_cadastro(admin)
             db.session.commit()
             print("Usuário admin criado: admin@portal.com / admin123")
         
@@ -702,10 +1552,23 @@ with app.app_context():
                 existente = Usuario.query.filter_by(email=usuario.email).first()
                 if not existente:
                     db.session.add(usuario)
+                    registrar_cadastro(usuario)
             
             db.session.commit()
             print("Usuários de exemplo criados com sucesso!")
         
+        # Indexa currículos novos ou alterados desde a última execução
+        try:
+            sincronizar_curriculos()
+        except Exception as e:
+            print(f"Erro ao agendar a indexação dos currículos: {e}")
+        
+        # Retoma notificações e emails que ficaram pela metade
+        try:
+            retomar_notificacoes()
+        except Exception as e:
+            print(f"Erro ao retomar as notificações pendentes: {e}")
+        
         print("Banco de dados inicializado com sucesso!")
         
     except Exception as e:
@@ -725,6 +1588,7 @@ with app.app_context():
             telefone='(00) 00000-0000'
         )
         db.session.add(admin)
+        registrar_cadastro(admin)
         db.session.commit()
         print("Banco de dados recriado e admin criado.")
 
@@ -0,0 +1,189 @@
+# Configuração dos benchmarks: banco SQLite temporário, populado em vários tamanhos
+import json
+import os
+import shutil
+import tempfile
+import tracemalloc
+
+import pytest
+
+# O app lê DATABASE_URL ao ser importado, então o banco temporário vem antes do import
+_pasta_temporaria = tempfile.mkdtemp(prefix='estagiofacil_bench_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_pasta_temporaria, 'bench.db')
+
+from sqlalchemy import event, insert
+from werkzeug.security import generate_password_hash
+
+from app import app, db, Usuario, Vaga, Candidatura
+
+# Quantidade de alunos em cada cenário (empresas, vagas e candidaturas crescem junto)
+TAMANHOS = [100, 1000, 5000]
+
+SENHA = '123456'
+AREAS = ['ti', 'adm', 'rh', 'mkt', 'eng']
+TIPOS = ['Presencial', 'Remoto', 'Híbrido']
+
+CAMINHO_BASELINE = os.path.join(os.path.dirname(__file__), 'baseline.json')
+
+# ATUALIZAR_BASELINE=1 grava os valores medidos em vez de comparar
+ATUALIZAR_BASELINE = os.environ.get('ATUALIZAR_BASELINE') == '1'
+
+# Folga da memória em relação ao baseline (consultas não podem aumentar)
+TOLERANCIA_MEMORIA = 1.5
+FOLGA_MEMORIA_KB = 64
+
+# Folga do tempo médio: o baseline foi medido em outra máquina, então é larga por padrão
+# (em CI com máquina fixa, dá para apertar com TOLERANCIA_TEMPO=1.2)
+TOLERANCIA_TEMPO = float(os.environ.get('TOLERANCIA_TEMPO', '2.0'))
+
+
+def popular(total_alunos):
+    # Inserção em lote; o hash da senha é calculado uma vez só (scrypt é lento)
+    db.drop_all()
+    db.create_all()
+    senha = generate_password_hash(SENHA)
+
+    total_empresas = max(total_alunos // 20, 1)
+    total_vagas = max(total_alunos // 5, 1)
+
+    usuarios = [{'tipo': 'admin', 'nome': 'Administrador', 'email': 'admin@bench.com', 'senha': senha}]
+    usuarios += [{'tipo': 'empresa', 'nome': f'Empresa {i}', 'email': f'empresa{i}@bench.com', 'senha': senha,
+                  'cnpj': f'{i:014d}', 'endereco': 'São Paulo, SP'} for i in range(total_empresas)]
+    usuarios += [{'tipo': 'aluno', 'nome': f'Aluno {i}', 'email': f'aluno{i}@bench.com', 'senha': senha,
+                  'cpf': f'{i:011d}', 'telefone': '(11) 99999-9999'} for i in range(total_alunos)]
+    db.session.execute(insert(Usuario), usuarios)
+
+    empresas = [id for (id,) in db.session.query(Usuario.id).filter_by(tipo='empresa').order_by(Usuario.id)]
+    alunos = [id for (id,) in db.session.query(Usuario.id).filter_by(tipo='aluno').order_by(Usuario.id)]
+
+    db.session.execute(insert(Vaga), [
+        {'titulo': f'Vaga {i}', 'descricao': 'Descrição da vaga.\n\nRequisitos:\n- Boa comunicação.',
+         'salario': 'R$ 1.500', 'localizacao': 'São Paulo, SP', 'tipo': TIPOS[i % len(TIPOS)],
+         'area': AREAS[i % len(AREAS)], 'beneficios': 'VR, VT', 'empresa_id': empresas[i % len(empresas)]}
+        for i in range(total_vagas)
+    ])
+    vagas = [id for (id,) in db.session.query(Vaga.id).order_by(Vaga.id)]
+
+    # Três candidaturas por aluno, espalhadas entre as vagas
+    db.session.execute(insert(Candidatura), [
+        {'usuario_id': aluno, 'vaga_id': vagas[(i * 7 + k) % len(vagas)]}
+        for i, aluno in enumerate(alunos) for k in range(3)
+    ])
+    db.session.commit()
+
+    return {
+        'admin': db.session.query(Usuario.id).filter_by(tipo='admin').scalar(),
+        'empresa': empresas[0],
+        'aluno': alunos[0],
+        'vagas': vagas,
+    }
+
+
+@pytest.fixture(scope='session', params=TAMANHOS, ids=lambda tamanho: f'{tamanho}_alunos')
+def banco(request):
+    app.config['TESTING'] = True
+    with app.app_context():
+        ids = popular(request.param)
+    ids['tamanho'] = request.param
+    return ids
+
+
+@pytest.fixture
+def cliente(banco):
+    return app.test_client()
+
+
+def logar(cliente, usuario_id, tipo):
+    with cliente.session_transaction() as sessao:
+        sessao['user_id'] = usuario_id
+        sessao['user_type'] = tipo
+        sessao['user_name'] = 'Benchmark'
+
+
+class ContadorConsultas:
+    # Conta os comandos SQL enviados ao banco enquanto estiver ativo
+    def __init__(self):
+        self.total = 0
+
+    def _contar(self, *args):
+        self.total += 1
+
+    def __enter__(self):
+        with app.app_context():
+            self.engine = db.engine
+        event.listen(self.engine, 'before_cursor_execute', self._contar)
+        return self
+
+    def __exit__(self, *args):
+        event.remove(self.engine, 'before_cursor_execute', self._contar)
+
+
+def medir_execucao(funcao):
+    # Uma execução fora do cronômetro: número de consultas e pico de memória
+    tracemalloc.start()
+    try:
+        with ContadorConsultas() as contador:
+            funcao()
+        _, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return contador.total, round(pico / 1024, 1)
+
+
+def carregar_baseline():
+    if not os.path.exists(CAMINHO_BASELINE):
+        return {}
+    with open(CAMINHO_BASELINE, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+_medicoes = {}
+
+
+@pytest.fixture
+def comparar_baseline(request, benchmark):
+    # Registra consultas/memória no relatório do pytest-benchmark e compara tudo com o baseline
+    # (chamar depois do benchmark, para o tempo médio já estar medido)
+    baseline = carregar_baseline()
+
+    def comparar(funcao):
+        consultas, memoria_kb = medir_execucao(funcao)
+        benchmark.extra_info['consultas'] = consultas
+        benchmark.extra_info['memoria_pico_kb'] = memoria_kb
+        medicao = {'consultas': consultas, 'memoria_pico_kb': memoria_kb}
+
+        # Sem estatísticas com --benchmark-disable
+        tempo_ms = round(benchmark.stats.stats.mean * 1000, 3) if benchmark.stats else None
+        if tempo_ms is not None:
+            medicao['tempo_medio_ms'] = tempo_ms
+        _medicoes[request.node.name] = medicao
+
+        esperado = baseline.get(request.node.name)
+        if ATUALIZAR_BASELINE or esperado is None:
+            return
+        assert consultas <= esperado['consultas'], (
+            f"{request.node.name}: {consultas} consultas (baseline: {esperado['consultas']})")
+        assert memoria_kb <= esperado['memoria_pico_kb'] * TOLERANCIA_MEMORIA + FOLGA_MEMORIA_KB, (
+            f"{request.node.name}: pico de {memoria_kb} KB (baseline: {esperado['memoria_pico_kb']} KB)")
+        if tempo_ms is not None and 'tempo_medio_ms' in esperado:
+            assert tempo_ms <= esperado['tempo_medio_ms'] * TOLERANCIA_TEMPO, (
+                f"{request.node.name}: {tempo_ms} ms em média (baseline: {esperado['tempo_medio_ms']} ms, "
+                f"tolerância {TOLERANCIA_TEMPO}x)")
+
+    return comparar
+
+
+def pytest_sessionfinish(session, exitstatus):
+    if ATUALIZAR_BASELINE and _medicoes:
+        baseline = carregar_baseline()
+        for nome, medicao in _medicoes.items():
+            # Uma rodada com --benchmark-disable não apaga o tempo já gravado
+            baseline[nome] = {**baseline.get(nome, {}), **medicao}
+        with open(CAMINHO_BASELINE, 'w', encoding='utf-8') as arquivo:
+            json.dump(dict(sorted(baseline.items())), arquivo, indent=2, ensure_ascii=False)
+            arquivo.write('\n')
+
+    # Fecha as conexões antes de apagar o banco temporário
+    with app.app_context():
+        db.engine.dispose()
+    shutil.rmtree(_pasta_temporaria, ignore_errors=True)
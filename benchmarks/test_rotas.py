@@ -0,0 +1,73 @@
+# Benchmarks das rotas mais acessadas, pelo test client do Flask
+from conftest import SENHA, logar
+from app import app, db, Candidatura
+
+
+def test_home(benchmark, comparar_baseline, cliente):
+    def requisicao():
+        resposta = cliente.get('/')
+        assert resposta.status_code == 200
+
+    benchmark(requisicao)
+    comparar_baseline(requisicao)
+
+
+def test_login(benchmark, comparar_baseline, cliente, banco):
+    def requisicao():
+        resposta = cliente.post('/login', data={'email': 'aluno0@bench.com', 'senha': SENHA, 'tipo_usuario': 'aluno'})
+        assert resposta.status_code == 302
+
+    benchmark(requisicao)
+    comparar_baseline(requisicao)
+
+
+def test_candidatar_vaga(benchmark, comparar_baseline, cliente, banco):
+    logar(cliente, banco['aluno'], 'aluno')
+    vaga_id = banco['vagas'][-1] # O aluno 0 ainda não se candidatou a ela
+
+    def desfazer_candidatura():
+        # Fora do cronômetro: cada rodada mede uma candidatura nova
+        with app.app_context():
+            Candidatura.query.filter_by(usuario_id=banco['aluno'], vaga_id=vaga_id).delete()
+            db.session.commit()
+
+    def requisicao():
+        resposta = cliente.get(f'/vaga/candidatar/{vaga_id}')
+        assert resposta.status_code == 302
+
+    benchmark.pedantic(requisicao, setup=desfazer_candidatura, rounds=50)
+    desfazer_candidatura()
+    comparar_baseline(requisicao)
+
+
+def test_aluno_dashboard(benchmark, comparar_baseline, cliente, banco):
+    logar(cliente, banco['aluno'], 'aluno')
+
+    def requisicao():
+        resposta = cliente.get('/aluno/dashboard')
+        assert resposta.status_code == 200
+
+    benchmark(requisicao)
+    comparar_baseline(requisicao)
+
+
+def test_empresa_dashboard(benchmark, comparar_baseline, cliente, banco):
+    logar(cliente, banco['empresa'], 'empresa')
+
+    def requisicao():
+        resposta = cliente.get('/empresa/dashboard')
+        assert resposta.status_code == 200
+
+    benchmark(requisicao)
+    comparar_baseline(requisicao)
+
+
+def test_admin_usuarios(benchmark, comparar_baseline, cliente, banco):
+    logar(cliente, banco['admin'], 'admin')
+
+    def requisicao():
+        resposta = cliente.get('/admin/usuarios')
+        assert resposta.status_code == 200
+
+    benchmark(requisicao)
+    comparar_baseline(requisicao)